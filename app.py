@@ -1,12 +1,22 @@
 # app.py - Modular Flask Application for Market Data Streaming
 import os
+import gzip
+import hashlib
 import logging
 from datetime import timedelta
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session, g, Response
 from flask_socketio import SocketIO
 from dotenv import load_dotenv
+from jinja2 import FileSystemBytecodeCache
 from auth import get_schwab_client, get_schwab_streamer, require_auth
 from features.feature_manager import FeatureManager
+from streaming import fast_json
+
+# Brotli is optional; without it static assets are only precompressed with gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Load environment variables
 load_dotenv()
@@ -22,8 +32,14 @@ logging.getLogger('Schwabdev.Tokens').setLevel(logging.WARNING)
 class Config:
     SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here')
     DEBUG = os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+    # Outside debug, Jinja skips the per-render mtime stat of each template
+    TEMPLATES_AUTO_RELOAD = DEBUG
+    # Template asset URLs carry a content hash, so browsers may cache the files for a year
+    SEND_FILE_MAX_AGE_DEFAULT = None if DEBUG else 31536000
     HOST = '0.0.0.0'
     PORT = 8000
+    # Per-request cProfile output for the Flask routes (debug only)
+    PROFILE_REQUESTS = DEBUG and os.getenv('FLASK_PROFILE', 'false').lower() == 'true'
     
     # Feature toggles
     ENABLE_MARKET_DATA = os.getenv('ENABLE_MARKET_DATA', 'true').lower() == 'true'
@@ -33,22 +49,127 @@ class Config:
     DATA_DIR = os.path.join(BASE_DIR, 'data')
     TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
     STATIC_DIR = os.path.join(BASE_DIR, 'static')
+    JINJA_CACHE_DIR = os.path.join(DATA_DIR, 'jinja_cache')
+    PROFILE_DIR = os.path.join(DATA_DIR, 'profiles')
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
 app.permanent_session_lifetime = timedelta(hours=24)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading')
+# Compiled template bytecode persists across restarts and is shared between worker processes
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory=Config.JINJA_CACHE_DIR)
+if Config.PROFILE_REQUESTS:
+    # Wrapped before Socket.IO installs its middleware so only page/API routes are profiled
+    from werkzeug.middleware.profiler import ProfilerMiddleware
+    os.makedirs(Config.PROFILE_DIR, exist_ok=True)
+    app.wsgi_app = ProfilerMiddleware(app.wsgi_app, restrictions=[20], profile_dir=Config.PROFILE_DIR)
+# Socket.IO payloads are encoded with the same fast JSON backend used for stream frames
+# Threading mode: the quote writer and stream threads block in SQLite/socket calls, which
+# would stall a green-thread hub (eventlet/gevent) for every client
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading',
+                    json=fast_json)
 
 # Initialize feature manager
 feature_manager = FeatureManager(Config.DATA_DIR, socketio)
 app.feature_manager = feature_manager  # Make accessible via current_app
 
-# Create required directories
-os.makedirs(Config.DATA_DIR, exist_ok=True)
-os.makedirs(Config.TEMPLATES_DIR, exist_ok=True)
-os.makedirs(os.path.join(Config.STATIC_DIR, 'css'), exist_ok=True)
-os.makedirs(os.path.join(Config.STATIC_DIR, 'js'), exist_ok=True)
+# Create required directories (makedirs creates STATIC_DIR along with its subdirectories)
+for required_dir in (Config.DATA_DIR,
+                     Config.JINJA_CACHE_DIR,
+                     Config.TEMPLATES_DIR,
+                     os.path.join(Config.STATIC_DIR, 'css'),
+                     os.path.join(Config.STATIC_DIR, 'js')):
+    os.makedirs(required_dir, exist_ok=True)
+
+# Watchlist symbols for the chart pages, re-read only when watchlist.json changes
+_watchlist_cache = {'mtime': None, 'symbols': []}
+
+def _get_watchlist_symbols() -> list:
+    """Get watchlist symbols, using the cached copy while the file's mtime is unchanged"""
+    watchlist_path = os.path.join(Config.BASE_DIR, 'watchlist.json')
+    try:
+        mtime = os.stat(watchlist_path).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    
+    if mtime != _watchlist_cache['mtime']:
+        with open(watchlist_path, 'rb') as f:
+            watchlist_data = fast_json.loads(f.read())
+        _watchlist_cache['symbols'] = watchlist_data.get('symbols', [])
+        _watchlist_cache['mtime'] = mtime
+    
+    return list(_watchlist_cache['symbols'])
+
+# Static asset URLs only depend on the file, so each is built (and fingerprinted) once
+_static_url_cache = {}
+
+def static_url(filename: str) -> str:
+    """Cached url_for('static', ...) with a content-hash query string for cache busting"""
+    url = _static_url_cache.get(filename)
+    if url is None:
+        try:
+            with open(os.path.join(Config.STATIC_DIR, filename), 'rb') as f:
+                version = hashlib.sha1(f.read()).hexdigest()[:12]
+        except OSError:
+            version = None
+        url = url_for('static', filename=filename, v=version)
+        # In debug the assets are being edited, so re-hash on every render
+        if not app.debug:
+            _static_url_cache[filename] = url
+    return url
+
+app.jinja_env.globals['static_url'] = static_url
+
+# Compressed bodies of the static CSS/JS files, built once at startup: {filename: {encoding: bytes}}
+# Encodings are stored in preference order, so br wins over gzip when a client accepts both
+_compressed_static = {}
+
+def _precompress_static():
+    """Compress the static CSS/JS files up front so responses never compress per request"""
+    for root, _, files in os.walk(Config.STATIC_DIR):
+        for name in files:
+            if not name.endswith(('.css', '.js')):
+                continue
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, Config.STATIC_DIR).replace(os.sep, '/')
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read()
+            except OSError as e:
+                logger.warning(f"Could not precompress {filename}: {e}")
+                continue
+            variants = {}
+            if brotli is not None:
+                variants['br'] = brotli.compress(content, quality=11)
+            variants['gzip'] = gzip.compress(content, compresslevel=9)
+            _compressed_static[filename] = variants
+
+@app.after_request
+def serve_precompressed_static(response):
+    """Swap a static file response for its precompressed body when the client accepts it"""
+    if request.endpoint != 'static' or response.status_code != 200:
+        return response
+
+    variants = _compressed_static.get((request.view_args or {}).get('filename'))
+    if not variants:
+        return response
+
+    response.vary.add('Accept-Encoding')
+    for encoding, body in variants.items():
+        if request.accept_encodings[encoding]:
+            original = response.response
+            response.direct_passthrough = False
+            response.set_data(body)
+            response.headers['Content-Encoding'] = encoding
+            if hasattr(original, 'close'):
+                original.close()
+            # Each encoding is a different representation, so it needs its own strong validator
+            etag, is_weak = response.get_etag()
+            if etag:
+                response.set_etag(f"{etag}-{encoding}", weak=is_weak)
+                response.make_conditional(request)
+            break
+    return response
 
 def _initialize_features(use_mock: bool = False):
     """Initialize features based on configuration"""
@@ -89,10 +210,28 @@ def _cleanup_features():
         except Exception as e:
             logger.error(f"Error stopping streaming during cleanup: {e}")
 
+@app.before_request
+def load_session_flags():
+    """Read the session auth flags once per request for route guards and handlers"""
+    # Static files need no auth; touching the session would decode the cookie and add Vary: Cookie
+    if request.endpoint == 'static':
+        return
+    g.authenticated = session.get('authenticated', False)
+    g.mock_mode = session.get('mock_mode', False)
+
+# The login page only varies by flash messages, so the common no-flash render is reused
+_login_html = None
+
 # Authentication routes
 @app.route('/login')
 def login():
-    return render_template('login.html')
+    global _login_html
+    if '_flashes' in session:
+        return render_template('login.html')
+
+    if _login_html is None or app.debug:
+        _login_html = render_template('login.html').encode('utf-8')
+    return Response(_login_html, mimetype='text/html')
 
 @app.route('/authenticate')
 def authenticate():
@@ -175,14 +314,7 @@ def historical_charts():
     """Historical charts viewer page"""
     try:
         # Get available symbols from watchlist
-        import json
-        watchlist_path = os.path.join(Config.BASE_DIR, 'watchlist.json')
-        
-        symbols = []
-        if os.path.exists(watchlist_path):
-            with open(watchlist_path, 'r') as f:
-                watchlist_data = json.load(f)
-                symbols = watchlist_data.get('symbols', [])
+        symbols = _get_watchlist_symbols()
         
         return render_template('historical_charts.html', symbols=symbols)
     except Exception as e:
@@ -201,8 +333,8 @@ def live_charts():
 def session_info():
     """API endpoint to get session information"""
     return jsonify({
-        'authenticated': session.get('authenticated', False),
-        'mock_mode': session.get('mock_mode', False)
+        'authenticated': g.authenticated,
+        'mock_mode': g.mock_mode
     })
 
 @app.route('/api/mock-speed', methods=['POST'])
@@ -217,7 +349,7 @@ def set_mock_speed():
         interval = max(0.001, min(60.0, interval))
         
         # Update mock speed if in mock mode and market data is enabled
-        if session.get('mock_mode') and feature_manager.is_feature_enabled('market_data'):
+        if g.mock_mode and feature_manager.is_feature_enabled('market_data'):
             market_data_manager = feature_manager.get_feature('market_data')
             if market_data_manager and hasattr(market_data_manager, 'equity_stream_manager'):
                 stream_manager = market_data_manager.equity_stream_manager
@@ -311,17 +443,9 @@ def test_data():
         database = OHLCDatabase(db_path)
         
         # Get stats for all symbols
-        import json
-        watchlist_path = os.path.join(Config.BASE_DIR, 'watchlist.json')
-        symbols = []
-        if os.path.exists(watchlist_path):
-            with open(watchlist_path, 'r') as f:
-                watchlist_data = json.load(f)
-                symbols = watchlist_data.get('symbols', [])
+        symbols = _get_watchlist_symbols()
         
-        stats = {}
-        for symbol in symbols:
-            stats[symbol] = database.get_symbol_stats(symbol)
+        stats = database.get_symbols_stats(symbols)
         
         return jsonify({
             'database_path': db_path,
@@ -378,12 +502,27 @@ def handle_connect():
 def handle_disconnect():
     logger.info('Client disconnected')
 
+def _prewarm_templates():
+    """Compile every template at startup so the first request doesn't pay for it"""
+    for template_name in app.jinja_env.list_templates(extensions=['html']):
+        try:
+            app.jinja_env.get_template(template_name)
+        except Exception as e:
+            logger.warning(f"Could not precompile template {template_name}: {e}")
+
+_prewarm_templates()
+# Assets are edited in place during debug, so only cache compressed copies otherwise
+if not Config.DEBUG:
+    _precompress_static()
+
 # Features will be initialized when user authenticates
 logger.info("🚀 Application started - features will be initialized on authentication")
 
 if __name__ == '__main__':
     logger.info(f"Starting Flask-SocketIO server on {Config.HOST}:{Config.PORT}")
     logger.info(f"Debug mode: {Config.DEBUG}")
+    if Config.PROFILE_REQUESTS:
+        logger.info(f"Request profiling enabled, writing .prof files to {Config.PROFILE_DIR}")
     logger.info(f"Features enabled: Market Data={Config.ENABLE_MARKET_DATA}")
     
     socketio.run(app, 
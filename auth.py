@@ -3,7 +3,7 @@ import os
 import dotenv
 import schwabdev
 from functools import wraps
-from flask import session, redirect, url_for, jsonify, request
+from flask import session, redirect, url_for, jsonify, request, g
 
 def _cleanup_invalid_tokens():
     """Remove invalid tokens file when refresh token expires."""
@@ -72,8 +72,8 @@ def require_auth(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        authenticated = session.get('authenticated')
-        print(f"🔍 require_auth check: path={request.path}, authenticated={authenticated}, session_keys={list(session.keys())}")
+        # app.before_request unpacks the session into g; fall back for apps without it
+        authenticated = g.authenticated if 'authenticated' in g else session.get('authenticated')
         
         if not authenticated:
             # Check if this is an API request (JSON content type or /api/ path)
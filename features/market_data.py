@@ -3,26 +3,96 @@ import os
 import json
 import logging
 import time
+from time import time_ns
 import sqlite3
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Any, Set, Optional, Callable
+from types import MappingProxyType
+from typing import Dict, Any, FrozenSet, Set, Optional, Callable, Mapping
 import threading
+import atexit
 from streaming.equity_stream_manager import EquityStreamManager
+from streaming import fast_json
+from features.quote_writer import QuoteWriter
+from features.market_data_broadcaster import MarketDataBroadcaster
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Schema for the daily market data database, applied in one executescript() call.
+# WAL lets readers proceed during writes; the mode persists in the file.
+_SCHEMA_SQL = '''
+PRAGMA journal_mode=WAL;
+
+CREATE TABLE IF NOT EXISTS equity_quotes (
+    id INTEGER PRIMARY KEY,
+    symbol TEXT,
+    timestamp INTEGER,
+    last_price REAL,
+    bid_price REAL,
+    ask_price REAL,
+    volume INTEGER,
+    net_change REAL,
+    net_change_percent REAL,
+    high_price REAL,
+    low_price REAL,
+    data_source TEXT DEFAULT 'UNKNOWN'
+);
+
+-- Metadata table to track data source
+CREATE TABLE IF NOT EXISTS data_metadata (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at INTEGER,
+    data_source TEXT,
+    app_version TEXT,
+    notes TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_equity_symbol_ts ON equity_quotes (symbol, timestamp);
+'''
+
+# Database files whose schema, metadata and WAL mode have been set up
+_initialized_db_paths: Set[str] = set()
+_init_lock = threading.Lock()
+
+# Every cached connection, so they can be closed at interpreter exit
+_open_connections: Set[sqlite3.Connection] = set()
+
+def _close_all_connections():
+    """Close every cached database connection"""
+    for conn in list(_open_connections):
+        try:
+            conn.close()
+        except Exception:
+            pass
+    _open_connections.clear()
+
+atexit.register(_close_all_connections)
+
 class MarketDataManager:
     def __init__(self, data_dir: str):
         self.data_dir = data_dir
-        self.market_data: Dict[str, Any] = {}
-        self.watchlist: Set[str] = set()
+        # Immutable snapshot swapped on every write; readers never need a lock
+        self._market_data_snapshot: Dict[str, Any] = {}
+        self.market_data: Mapping[str, Any] = MappingProxyType(self._market_data_snapshot)
+        self._market_data_lock = threading.Lock()
+        # (snapshot, encoded JSON) of the last snapshot served over HTTP
+        self._market_data_json = (None, '{}')
+        # Writers swap in a new frozenset under the lock; readers just take the reference
+        self.watchlist: FrozenSet[str] = frozenset()
+        self._watchlist_lock = threading.Lock()
         self.is_mock_mode = False
         
         # Initialize equity streaming manager
         self.equity_stream_manager = EquityStreamManager()
         self.equity_stream_manager.set_equity_data_handler(self._process_equity_data_callback)
         
+        # Batched background writer for equity quotes; each run is bound to one mode's database
+        self._db_local = threading.local()
+        self.quote_writer = QuoteWriter(self.get_db_connection, self.close_db_connections)
+        
+        # Socket.io emits run off the streaming thread
+        self.broadcaster = MarketDataBroadcaster()
+        
         # Watchlist file path - should be in the same directory as app.py
         self.watchlist_file = os.path.join(os.path.dirname(data_dir), 'watchlist.json')
         
@@ -36,90 +106,139 @@ class MarketDataManager:
         """Inject external dependencies"""
         self.schwab_client = schwab_client
         self.socketio = socketio
+        
+        # Flush queued quotes into the previous mode's database before switching;
+        # wait for the full drain so no new-mode quote is picked up by the old run
+        if is_mock_mode != self.is_mock_mode and self.quote_writer.is_running():
+            self.quote_writer.stop(timeout=None)
+            self.is_mock_mode = is_mock_mode
+            self._start_quote_writer()
         self.is_mock_mode = is_mock_mode
+        self.initialize_database(is_mock_mode)
+        self.broadcaster.set_dependencies(socketio)
         
         # Configure equity stream manager
         self.equity_stream_manager.set_dependencies(schwab_streamer, socketio, is_mock_mode)
     
+    def _get_db_filename(self, is_mock_mode: bool, today_date: str) -> str:
+        """Get the database path for a mode and date"""
+        if is_mock_mode:
+            return os.path.join(self.data_dir, f'MOCK_market_data_{today_date}.db')
+        return os.path.join(self.data_dir, f'market_data_{today_date}.db')
+    
+    def initialize_database(self, is_mock_mode: Optional[bool] = None):
+        """Create tables, indexes and metadata for today's database (once per file)"""
+        if is_mock_mode is None:
+            is_mock_mode = self.is_mock_mode
+        
+        db_filename = self._get_db_filename(is_mock_mode, datetime.now().strftime('%y%m%d'))
+        
+        with _init_lock:
+            if db_filename in _initialized_db_paths:
+                return
+            
+            conn = sqlite3.connect(db_filename)
+            try:
+                cursor = conn.cursor()
+                
+                cursor.executescript(_SCHEMA_SQL)
+                
+                # Insert metadata record on first connection
+                cursor.execute('SELECT COUNT(*) FROM data_metadata')
+                if cursor.fetchone()[0] == 0:
+                    data_source = 'MOCK' if is_mock_mode else 'SCHWAB_API'
+                    cursor.execute('''
+                        INSERT INTO data_metadata (created_at, data_source, app_version, notes)
+                        VALUES (?, ?, ?, ?)
+                    ''', (
+                        time_ns() // 1_000_000,
+                        data_source,
+                        "1.0.0",
+                        f"Database created in {'mock' if is_mock_mode else 'real'} mode"
+                    ))
+                conn.commit()
+            finally:
+                conn.close()
+            
+            _initialized_db_paths.add(db_filename)
+    
     def get_db_connection(self, is_mock_mode: Optional[bool] = None) -> sqlite3.Connection:
-        """Get database connection with mock/real separation"""
+        """Get this thread's cached database connection with mock/real separation"""
         if is_mock_mode is None:
             is_mock_mode = self.is_mock_mode
         
         today_date = datetime.now().strftime('%y%m%d')
+        key = (is_mock_mode, today_date)
         
-        if is_mock_mode:
-            db_filename = os.path.join(self.data_dir, f'MOCK_market_data_{today_date}.db')
-        else:
-            db_filename = os.path.join(self.data_dir, f'market_data_{today_date}.db')
+        connections = getattr(self._db_local, 'connections', None)
+        if connections is None:
+            connections = self._db_local.connections = {}
         
-        conn = sqlite3.connect(db_filename)
-        cursor = conn.cursor()
+        conn = connections.get(key)
+        if conn is not None:
+            return conn
         
-        # Create equity quotes table
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS equity_quotes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            symbol TEXT,
-            timestamp INTEGER,
-            last_price REAL,
-            bid_price REAL,
-            ask_price REAL,
-            volume INTEGER,
-            net_change REAL,
-            net_change_percent REAL,
-            high_price REAL,
-            low_price REAL,
-            data_source TEXT DEFAULT 'UNKNOWN'
-        )
-        ''')
+        # Close connections left over from a previous day
+        for stale_key in [k for k in connections if k[1] != today_date]:
+            self._close_connection(connections.pop(stale_key))
         
-        # Metadata table to track data source
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS data_metadata (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            created_at INTEGER,
-            data_source TEXT,
-            app_version TEXT,
-            notes TEXT
-        )
-        ''')
+        self.initialize_database(is_mock_mode)
         
-        # Insert metadata record on first connection
-        cursor.execute('SELECT COUNT(*) FROM data_metadata')
-        if cursor.fetchone()[0] == 0:
-            data_source = 'MOCK' if is_mock_mode else 'SCHWAB_API'
-            cursor.execute('''
-                INSERT INTO data_metadata (created_at, data_source, app_version, notes)
-                VALUES (?, ?, ?, ?)
-            ''', (
-                int(time.time() * 1000),
-                data_source,
-                "1.0.0",
-                f"Database created in {'mock' if is_mock_mode else 'real'} mode"
-            ))
+        conn = sqlite3.connect(self._get_db_filename(is_mock_mode, today_date), check_same_thread=False)
+        cursor = conn.cursor()
+        
+        # NORMAL sync skips the per-commit fsync under WAL
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.execute('PRAGMA cache_size=-65536')
+        cursor.execute('PRAGMA temp_store=MEMORY')
+        cursor.execute('PRAGMA mmap_size=268435456')
+        cursor.execute('PRAGMA wal_autocheckpoint=1000')
+        cursor.execute('PRAGMA busy_timeout=5000')
+        cursor.execute('PRAGMA cache_spill=0')
         
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_equity_symbol_ts ON equity_quotes (symbol, timestamp)')
-        conn.commit()
+        connections[key] = conn
+        _open_connections.add(conn)
         return conn
     
-    def load_watchlist(self) -> Set[str]:
+    def _start_quote_writer(self):
+        """Start the quote writer bound to the current mode's database"""
+        is_mock_mode = self.is_mock_mode
+        self.quote_writer.start(lambda: self.get_db_connection(is_mock_mode))
+    
+    def close_db_connections(self):
+        """Close the database connections cached for the calling thread"""
+        connections = getattr(self._db_local, 'connections', None)
+        if not connections:
+            return
+        for conn in connections.values():
+            self._close_connection(conn)
+        connections.clear()
+    
+    def _close_connection(self, conn: sqlite3.Connection):
+        """Close a cached connection and stop tracking it"""
+        _open_connections.discard(conn)
+        try:
+            conn.close()
+        except Exception as e:
+            logger.error(f"Error closing database connection: {e}")
+    
+    def load_watchlist(self) -> FrozenSet[str]:
         """Load watchlist from JSON file"""
         try:
             logger.info(f"Attempting to load watchlist from: {self.watchlist_file}")
             logger.info(f"File exists: {os.path.exists(self.watchlist_file)}")
             
             if os.path.exists(self.watchlist_file):
-                with open(self.watchlist_file, 'r') as f:
-                    data = json.load(f)
-                    self.watchlist = set(data.get('symbols', []))
+                with open(self.watchlist_file, 'rb') as f:
+                    data = fast_json.loads(f.read())
+                    self.watchlist = frozenset(data.get('symbols', []))
                     logger.info(f"Successfully loaded watchlist with {len(self.watchlist)} symbols: {list(self.watchlist)}")
             else:
-                self.watchlist = set()
+                self.watchlist = frozenset()
                 logger.warning(f"Watchlist file not found at {self.watchlist_file}, starting with empty watchlist")
         except Exception as e:
             logger.error(f"Error loading watchlist from {self.watchlist_file}: {e}")
-            self.watchlist = set()
+            self.watchlist = frozenset()
         
         return self.watchlist
     
@@ -136,10 +255,10 @@ class MarketDataManager:
         """Add symbol to watchlist and subscribe to streaming"""
         symbol = symbol.upper().strip()
         
-        if symbol in self.watchlist:
-            return False
-        
-        self.watchlist.add(symbol)
+        with self._watchlist_lock:
+            if symbol in self.watchlist:
+                return False
+            self.watchlist = self.watchlist | {symbol}
         self.save_watchlist()
         
         # Subscribe via equity stream manager (handles all subscription logic)
@@ -149,15 +268,15 @@ class MarketDataManager:
     def remove_symbol(self, symbol: str) -> bool:
         """Remove symbol from watchlist"""
         symbol = symbol.upper().strip()
-        if symbol not in self.watchlist:
-            return False
-        
-        self.watchlist.remove(symbol)
+        with self._watchlist_lock:
+            if symbol not in self.watchlist:
+                return False
+            self.watchlist = self.watchlist - {symbol}
         self.save_watchlist()
         
         # Remove from market data
         if symbol in self.market_data:
-            del self.market_data[symbol]
+            self._publish_market_data(symbol, None)
         
         # Remove from stream manager
         self.equity_stream_manager.remove_equity_subscription(symbol)
@@ -171,12 +290,36 @@ class MarketDataManager:
     def get_market_data(self) -> Dict[str, Any]:
         """Get current market data with metadata"""
         return {
-            'market_data': self.market_data,
+            'market_data': self._market_data_snapshot,
             'is_mock_mode': self.is_mock_mode,
             'data_source': 'MOCK' if self.is_mock_mode else 'SCHWAB_API',
-            'timestamp': int(time.time() * 1000)
+            'timestamp': time_ns() // 1_000_000
         }
     
+    def get_market_data_json(self) -> str:
+        """get_market_data() as JSON, re-encoding the quotes only when the snapshot has changed"""
+        snapshot = self._market_data_snapshot
+        cached_snapshot, encoded = self._market_data_json
+        if cached_snapshot is not snapshot:
+            encoded = fast_json.dumps(snapshot)
+            self._market_data_json = (snapshot, encoded)
+        
+        source = 'MOCK' if self.is_mock_mode else 'SCHWAB_API'
+        is_mock = 'true' if self.is_mock_mode else 'false'
+        return (f'{{"market_data":{encoded},"is_mock_mode":{is_mock},'
+                f'"data_source":"{source}","timestamp":{time_ns() // 1_000_000}}}')
+    
+    def _publish_market_data(self, symbol: str, equity_data: Optional[Dict[str, Any]]):
+        """Copy-on-write update of the market data snapshot (None removes the symbol)"""
+        with self._market_data_lock:
+            snapshot = dict(self._market_data_snapshot)
+            if equity_data is None:
+                snapshot.pop(symbol, None)
+            else:
+                snapshot[symbol] = equity_data
+            self._market_data_snapshot = snapshot
+            self.market_data = MappingProxyType(snapshot)
+    
     def _process_equity_data_callback(self, equity_data: Dict[str, Any]):
         """Callback for processed equity data from EquityStreamManager"""
         symbol = equity_data.get('symbol')
@@ -184,34 +327,24 @@ class MarketDataManager:
             return
             
         # Store globally
-        self.market_data[symbol] = equity_data
+        self._publish_market_data(symbol, equity_data)
         
         # Save to database
         self._save_to_database(equity_data)
         
-        # Emit to clients
+        # Emit to clients via the background broadcaster
         if self.socketio:
-            self.socketio.emit('market_data', {
-                'symbol': symbol, 
-                'data': equity_data,
-                'is_mock': self.is_mock_mode
-            })
+            self.broadcaster.publish(symbol, equity_data, self.is_mock_mode)
         
-        # Enhanced logging
-        source_label = "MOCK" if self.is_mock_mode else "REAL"
-        logger.info(f"{source_label} data for {symbol}: Last ${equity_data.get('last_price', 'N/A')}")
+        # Per-tick detail only when debugging; the broadcaster logs a 1Hz summary
+        if logger.isEnabledFor(logging.DEBUG):
+            source_label = "MOCK" if self.is_mock_mode else "REAL"
+            logger.debug(f"{source_label} data for {symbol}: Last ${equity_data.get('last_price', 'N/A')}")
 
     def _save_to_database(self, market_data_item: Dict[str, Any]):
-        """Save market data to database"""
+        """Queue market data for the batched database writer"""
         try:
-            conn = self.get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO equity_quotes 
-                (symbol, timestamp, last_price, bid_price, ask_price, volume, 
-                 net_change, net_change_percent, high_price, low_price, data_source)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            self.quote_writer.enqueue((
                 market_data_item['symbol'], market_data_item['timestamp'], 
                 market_data_item['last_price'], market_data_item['bid_price'],
                 market_data_item['ask_price'], market_data_item['volume'], 
@@ -219,8 +352,6 @@ class MarketDataManager:
                 market_data_item['high_price'], market_data_item['low_price'], 
                 market_data_item['data_source']
             ))
-            conn.commit()
-            conn.close()
         except Exception as e:
             logger.error(f"Database error: {e}")
     
@@ -228,6 +359,9 @@ class MarketDataManager:
         """Start market data streaming via equity stream manager"""
         logger.info("Starting market data streaming")
         
+        self._start_quote_writer()
+        self.broadcaster.start()
+        
         if not self.equity_stream_manager.start_streaming():
             logger.error("Failed to start equity stream manager")
             return False
@@ -235,36 +369,39 @@ class MarketDataManager:
         try:
             # Clear any existing subscriptions first, then resubscribe
             logger.info("Clearing any existing subscriptions...")
+            watchlist = self.watchlist
             if hasattr(self.equity_stream_manager, 'clear_and_resubscribe_all'):
                 # If we have symbols, clear and resubscribe
-                if self.watchlist:
+                if watchlist:
                     # Add symbols to subscription manager first
-                    for symbol in self.watchlist:
+                    for symbol in watchlist:
                         self.equity_stream_manager.add_subscription(symbol)
                     
                     # Now clear server subscriptions and resubscribe
                     self.equity_stream_manager.clear_and_resubscribe_all()
-                    logger.info(f"Cleared and resubscribed to {len(self.watchlist)} symbols: {', '.join(list(self.watchlist))}")
+                    logger.info(f"Cleared and resubscribed to {len(watchlist)} symbols: {', '.join(watchlist)}")
                 else:
                     # Subscribe to default symbol if no watchlist
                     default_symbol = "SPY"
                     self.equity_stream_manager.add_equity_subscription(default_symbol)
-                    self.watchlist.add(default_symbol)
+                    with self._watchlist_lock:
+                        self.watchlist = self.watchlist | {default_symbol}
                     self.save_watchlist()
                     logger.info(f"Subscribed to default symbol: {default_symbol}")
             else:
                 # Fallback to old method
-                if self.watchlist:
-                    for symbol in self.watchlist:
+                if watchlist:
+                    for symbol in watchlist:
                         self.equity_stream_manager.add_equity_subscription(symbol)
                         time.sleep(0.1)  # Rate limit protection
                         
-                    logger.info(f"Subscribed to {len(self.watchlist)} symbols: {', '.join(list(self.watchlist))}")
+                    logger.info(f"Subscribed to {len(watchlist)} symbols: {', '.join(watchlist)}")
                 else:
                     # Subscribe to default symbol if no watchlist
                     default_symbol = "SPY"
                     self.equity_stream_manager.add_equity_subscription(default_symbol)
-                    self.watchlist.add(default_symbol)
+                    with self._watchlist_lock:
+                        self.watchlist = self.watchlist | {default_symbol}
                     self.save_watchlist()
                     logger.info(f"Subscribed to default symbol: {default_symbol}")
             
@@ -277,6 +414,8 @@ class MarketDataManager:
     def stop_streaming(self):
         """Stop market data streaming"""
         self.equity_stream_manager.stop_streaming()
+        self.quote_writer.stop()
+        self.broadcaster.stop()
         logger.info("Market data streaming stopped")
     
     def get_auth_status(self) -> Dict[str, Any]:
@@ -0,0 +1,107 @@
+# features/market_data_broadcaster.py - Off-thread socket.io fan-out for market data
+import logging
+import queue
+import time
+from typing import Any, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+class MarketDataBroadcaster:
+    """
+    Emits market data updates from a socket.io background task so the
+    streaming thread never blocks on frame serialization or client writes.
+
+    Updates are pushed onto a bounded queue (dropped when full) and the
+    worker collects them for ``batch_interval`` seconds, then sends the latest
+    update per symbol as a single 'market_data_batch' frame.
+    """
+
+    def __init__(self, max_queue_size: int = 10000, batch_interval: float = 0.05,
+                 report_interval: float = 1.0):
+        self.socketio = None
+        self.batch_interval = batch_interval
+        self.report_interval = report_interval
+        self.updates: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self.is_running = False
+        self._generation = 0
+        self._dropped = 0
+        self._tick_count = 0
+        self._reported_symbols: Set[str] = set()
+        self._last_report = time.monotonic()
+
+    def set_dependencies(self, socketio):
+        """Inject the socket.io server used for emits"""
+        self.socketio = socketio
+
+    def start(self):
+        """Start the emit worker"""
+        if self.is_running or not self.socketio:
+            return
+
+        self.is_running = True
+        self._generation += 1
+        self.socketio.start_background_task(self._emit_loop, self._generation)
+        logger.info("Market data broadcaster started")
+
+    def stop(self):
+        """Stop the emit worker after its current wait"""
+        self.is_running = False
+
+    def publish(self, symbol: str, data: Dict[str, Any], is_mock: bool):
+        """Queue an update for broadcast without blocking the caller"""
+        try:
+            self.updates.put_nowait((symbol, data, is_mock))
+        except queue.Full:
+            self._dropped += 1
+            if self._dropped % 1000 == 1:
+                logger.warning(f"Broadcast queue full, dropped {self._dropped} updates")
+
+    def _emit_loop(self, generation: int):
+        """Drain queued updates, keeping only the newest per symbol, and emit them"""
+        # A restart bumps the generation so a lingering worker exits instead of doubling up
+        while self.is_running and generation == self._generation:
+            try:
+                symbol, data, is_mock = self.updates.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            # Let the batch window fill, then keep only the newest update per symbol
+            self.socketio.sleep(self.batch_interval)
+            updates: Dict[str, Dict[str, Any]] = {symbol: data}
+            tick_count = 1
+            while True:
+                try:
+                    symbol, data, is_mock = self.updates.get_nowait()
+                except queue.Empty:
+                    break
+                updates[symbol] = data
+                tick_count += 1
+
+            try:
+                self.socketio.emit('market_data_batch', {
+                    'updates': updates,
+                    'is_mock': is_mock
+                })
+            except Exception as e:
+                logger.error(f"Error emitting market data batch ({len(updates)} symbols): {e}")
+
+            self._record_activity(tick_count, updates, is_mock)
+
+        logger.info("Market data broadcaster stopped")
+
+    def _record_activity(self, tick_count: int, updates: Dict[str, Dict[str, Any]], is_mock: bool):
+        """Accumulate tick counts and log an aggregate summary once per report interval"""
+        self._tick_count += tick_count
+        self._reported_symbols.update(updates)
+
+        now = time.monotonic()
+        elapsed = now - self._last_report
+        if elapsed < self.report_interval:
+            return
+
+        source_label = "MOCK" if is_mock else "REAL"
+        logger.info(f"{source_label} processed {self._tick_count} ticks for "
+                    f"{len(self._reported_symbols)} symbols in the last {elapsed:.1f}s")
+        self._tick_count = 0
+        self._reported_symbols.clear()
+        self._last_report = now
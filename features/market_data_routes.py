@@ -1,8 +1,10 @@
 # market_data_routes.py - Modular Market Data Routes
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session, current_app
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session, current_app, g, Response
 from flask_socketio import emit
 import logging
+import re
 from auth import require_auth
+from streaming import fast_json
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -10,10 +12,25 @@ logger = logging.getLogger(__name__)
 # Create blueprint
 market_data_bp = Blueprint('market_data', __name__)
 
+# Equity symbols are 1-5 uppercase letters
+_SYMBOL_RE = re.compile(r'^[A-Z]{1,5}$')
+
 def _get_manager():
     """Helper to get market data manager from feature manager"""
     return current_app.feature_manager.get_feature('market_data')
 
+def _json_payload() -> dict:
+    """Decode the request body with the fast JSON backend (empty body -> {})"""
+    raw = request.get_data(cache=False)
+    return fast_json.loads(raw) if raw else {}
+
+def _symbol_from(data) -> str:
+    """Normalized 'symbol' from a request or socket payload ('' when missing)"""
+    symbol = data.get('symbol') if data else None
+    if not isinstance(symbol, str):
+        return ''
+    return symbol.strip().upper()
+
 @market_data_bp.route('/market-data')
 @require_auth
 def index():
@@ -38,8 +55,7 @@ def add_to_watchlist():
     """Add symbol to watchlist"""
     
     try:
-        data = request.get_json()
-        symbol = data.get('symbol', '').upper().strip()
+        symbol = _symbol_from(_json_payload())
         
         if not symbol:
             return jsonify({'error': 'Symbol is required'}), 400
@@ -64,8 +80,7 @@ def remove_from_watchlist():
     """Remove symbol from watchlist"""
     
     try:
-        data = request.get_json()
-        symbol = data.get('symbol', '').upper().strip()
+        symbol = _symbol_from(_json_payload())
         
         manager = _get_manager()
         if not manager:
@@ -87,13 +102,15 @@ def get_market_data():
     if not manager:
         return jsonify({'error': 'Market data manager not initialized'}), 500
     
-    return jsonify(manager.get_market_data())
+    # Pre-encoded body; the quotes are only re-serialized after a tick changes them
+    return Response(manager.get_market_data_json(), mimetype='application/json',
+                    headers={'Cache-Control': 'no-store'})
 
 @market_data_bp.route('/api/auth-status')
 def auth_status():
     """Get authentication and system status"""
-    is_authenticated = session.get('authenticated', False)
-    mock_mode = session.get('mock_mode', False)
+    is_authenticated = g.authenticated
+    mock_mode = g.mock_mode
     
     if not is_authenticated:
         return jsonify({'authenticated': False})
@@ -216,7 +233,7 @@ def debug_session():
     # Test if we can get auth client
     try:
         from auth import get_schwab_client
-        test_client = get_schwab_client(use_mock=session.get('mock_mode', False))
+        test_client = get_schwab_client(use_mock=g.mock_mode)
         client_info = {
             'can_create_client': test_client is not None,
             'client_type': type(test_client).__name__ if test_client else None
@@ -225,7 +242,7 @@ def debug_session():
         client_info = {'error': str(e)}
     
     return jsonify({
-        'authenticated': session.get('authenticated', False),
+        'authenticated': g.authenticated,
         'session_keys': list(session.keys()),
         'session_mock_mode': session.get('mock_mode', None),
         'market_data_manager_available': manager is not None,
@@ -251,11 +268,13 @@ def register_socketio_handlers(socketio):
         
         logger.info('Client connected to market data')
         
-        # Send current market data
+        # Send the current snapshot as one batch frame rather than one frame per symbol
         manager = _get_manager()
-        if manager:
-            for symbol, data in manager.market_data.items():
-                emit('market_data', {'symbol': symbol, 'data': data})
+        if manager and manager.market_data:
+            emit('market_data_batch', {
+                'updates': dict(manager.market_data),
+                'is_mock': manager.is_mock_mode
+            })
 
     @socketio.on('disconnect')
     def handle_disconnect():
@@ -267,7 +286,7 @@ def register_socketio_handlers(socketio):
             emit('error', {'message': 'Not authenticated'})
             return
         
-        symbol = data.get('symbol', '').upper().strip()
+        symbol = _symbol_from(data)
         if not symbol:
             emit('error', {'message': 'Symbol is required'})
             return
@@ -278,8 +297,7 @@ def register_socketio_handlers(socketio):
             return
         
         # Validate symbol format
-        import re
-        if not re.match(r'^[A-Z]{1,5}$', symbol):
+        if not _SYMBOL_RE.match(symbol):
             emit('error', {'message': 'Invalid symbol format'})
             return
         
@@ -295,7 +313,7 @@ def register_socketio_handlers(socketio):
             emit('error', {'message': 'Not authenticated'})
             return
         
-        symbol = data.get('symbol', '').upper().strip()
+        symbol = _symbol_from(data)
         
         manager = _get_manager()
         if not manager:
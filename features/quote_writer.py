@@ -0,0 +1,206 @@
+# features/quote_writer.py - Batched background writer for equity quotes
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EQUITY_INSERT_SQL = '''
+    INSERT INTO equity_quotes
+    (symbol, timestamp, last_price, bid_price, ask_price, volume,
+     net_change, net_change_percent, high_price, low_price, data_source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+class QuoteWriter:
+    """
+    Background writer that batches equity quote inserts into SQLite.
+
+    The streaming thread only enqueues row tuples onto a bounded queue (rows
+    are dropped with a warning if the disk falls that far behind); a single
+    daemon thread owns the database connection and commits up to
+    ``batch_size`` rows (or whatever arrived within ``flush_interval``
+    seconds) in one transaction. Automatic
+    WAL checkpoints are disabled on that connection; instead the writer runs
+    ``wal_checkpoint(TRUNCATE)`` every ``checkpoint_interval`` seconds between
+    batches so no insert pays for a checkpoint.
+    """
+
+    # Retries (with exponential backoff) when BEGIN IMMEDIATE outlasts busy_timeout
+    MAX_LOCK_RETRIES = 3
+
+    def __init__(self, connection_factory: Callable[[], sqlite3.Connection],
+                 connection_closer: Optional[Callable[[], None]] = None,
+                 batch_size: int = 500, flush_interval: float = 0.25,
+                 checkpoint_interval: float = 30.0, max_queue_size: int = 100000):
+        self.connection_factory = connection_factory
+        self.connection_closer = connection_closer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.rows: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._dropped = 0
+        # Each writer thread keeps its own connection factory and connection; a thread still
+        # draining after a timed-out stop() must not share either with its replacement
+        self._local = threading.local()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event: Optional[threading.Event] = None
+        self._atexit_registered = False
+
+    def start(self, connection_factory: Optional[Callable[[], sqlite3.Connection]] = None):
+        """
+        Start the writer thread.
+        
+        ``connection_factory`` overrides the constructor's factory for this run only,
+        so a run keeps writing to the database it was started for. If a previous run
+        is still draining after a timed-out stop(), this waits for it to exit first.
+        """
+        if self.is_running():
+            if not self._stop_event.is_set():
+                return
+            logger.info("Waiting for the previous quote writer to finish draining")
+            self._thread.join()
+
+        # A fresh event per run, so restarting never un-stops a previous thread
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._writer_loop,
+                                        args=(self._stop_event, connection_factory or self.connection_factory),
+                                        name='QuoteWriter', daemon=True)
+        self._thread.start()
+
+        # The thread is a daemon; make sure queued rows still land if the process exits while streaming
+        if not self._atexit_registered:
+            atexit.register(self.stop)
+            self._atexit_registered = True
+        logger.info("Quote writer started")
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        """Stop the writer thread after flushing any queued rows (timeout=None waits for the drain)"""
+        if not self.is_running():
+            return
+
+        self._stop_event.set()
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            # Keep the handle so is_running() stays true and start() waits for this thread
+            logger.warning(f"Quote writer still flushing after {timeout}s; it will exit once drained")
+            return
+
+        self._thread = None
+        logger.info("Quote writer stopped")
+
+    def is_running(self) -> bool:
+        """Check if the writer thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def enqueue(self, row: Tuple):
+        """Queue a row for insertion without blocking the caller (dropped if the queue is full)"""
+        try:
+            self.rows.put_nowait(row)
+        except queue.Full:
+            self._dropped += 1
+            if self._dropped % 1000 == 1:
+                logger.warning(f"Quote write queue full, dropped {self._dropped} rows")
+
+    def _writer_loop(self, stop_event: threading.Event,
+                     connection_factory: Callable[[], sqlite3.Connection]):
+        """Drain the queue in batches until stopped, then flush the remainder"""
+        self._local.factory = connection_factory
+        next_checkpoint = time.monotonic() + self.checkpoint_interval
+        while not stop_event.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+            if time.monotonic() >= next_checkpoint:
+                self._checkpoint()
+                next_checkpoint = time.monotonic() + self.checkpoint_interval
+
+        while True:
+            batch = self._next_batch(block=False)
+            if not batch:
+                break
+            self._flush(batch)
+        self._checkpoint()
+
+        # Connections are cached per thread; release this thread's on exit
+        self._local.conn = None
+        self._local.factory = None
+        if self.connection_closer:
+            self.connection_closer()
+
+    def _next_batch(self, block: bool = True) -> List[Tuple]:
+        """Collect up to batch_size rows, waiting at most flush_interval after the first"""
+        batch = []
+        try:
+            if block:
+                batch.append(self.rows.get(timeout=self.flush_interval))
+            else:
+                batch.append(self.rows.get_nowait())
+        except queue.Empty:
+            return batch
+
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic() if block else 0
+            try:
+                if remaining > 0:
+                    batch.append(self.rows.get(timeout=remaining))
+                else:
+                    batch.append(self.rows.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _flush(self, batch: List[Tuple]):
+        """Insert a batch of rows in a single transaction, retrying if the database is locked"""
+        for attempt in range(self.MAX_LOCK_RETRIES + 1):
+            conn = None
+            try:
+                conn = self._get_connection()
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany(EQUITY_INSERT_SQL, batch)
+                conn.execute('COMMIT')
+                return
+            except Exception as e:
+                if conn is not None and conn.in_transaction:
+                    try:
+                        conn.execute('ROLLBACK')
+                    except Exception:
+                        pass
+                
+                locked = isinstance(e, sqlite3.OperationalError) and 'locked' in str(e)
+                if locked and attempt < self.MAX_LOCK_RETRIES:
+                    time.sleep(0.05 * (2 ** attempt))
+                    continue
+                
+                logger.error(f"Database error writing {len(batch)} quotes: {e}")
+                return
+
+    def _checkpoint(self):
+        """Fold the WAL back into the database file and truncate it"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        try:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        except Exception as e:
+            logger.warning(f"WAL checkpoint failed: {e}")
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Get the writer's connection, configuring it the first time it is seen"""
+        connection_factory = getattr(self._local, 'factory', None) or self.connection_factory
+        conn = connection_factory()
+        if conn is not getattr(self._local, 'conn', None):
+            self._local.conn = conn
+            # Autocommit mode: the writer issues BEGIN IMMEDIATE/COMMIT itself, taking the
+            # write lock up front instead of upgrading a deferred transaction mid-batch
+            conn.isolation_level = None
+            # Checkpoints run on the writer's own schedule, never inside a commit
+            conn.execute('PRAGMA wal_autocheckpoint=0')
+        return conn
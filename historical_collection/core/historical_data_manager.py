@@ -253,9 +253,11 @@ class HistoricalDataManager:
             'pending': 0
         }
         
+        all_stats = self.database.get_symbols_stats(self.symbols)
+        
         for symbol in self.symbols:
             progress = self.database.get_collection_progress(symbol)
-            stats = self.database.get_symbol_stats(symbol)
+            stats = all_stats[symbol]
             
             symbol_status = {
                 'symbol': symbol,
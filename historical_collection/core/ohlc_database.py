@@ -1,11 +1,55 @@
 import sqlite3
 import logging
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterable
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Optional secondary indexes on ohlc_data. Symbol/timestamp lookups are served by the
+# UNIQUE(symbol, timestamp, timeframe) index, which INSERT OR REPLACE needs anyway.
+# These copy most of the table (roughly doubling the file), so they are only built on
+# request via create_secondary_indexes() / collect_historical --build-indexes.
+OHLC_INDEXES = {
+    # Covering index: chart range reads and per-symbol stats never touch the table rows
+    'idx_ohlc_cover': '''CREATE INDEX IF NOT EXISTS idx_ohlc_cover
+        ON ohlc_data(symbol, timeframe, timestamp, open_price, high_price,
+                     low_price, close_price, volume)''',
+}
+
+# Indexes from earlier schemas that duplicate the UNIQUE constraint's leading columns
+_REDUNDANT_INDEXES = ('idx_symbol_timeframe_timestamp', 'idx_symbol_timestamp')
+
+@contextmanager
+def deferred_indexes(conn: sqlite3.Connection, index_names: Iterable[str]):
+    """
+    Drop the named ohlc_data indexes for a bulk load and rebuild them afterwards.
+    
+    The drop, the load and the rebuild run in one transaction, so a failed load
+    rolls back to the original rows and indexes. Rebuilding scans the whole table,
+    so only wrap loads that are large relative to it (e.g. an initial backfill).
+    The connection must not have a transaction open; pass it to
+    insert_ohlc_data(conn=...) for the rows. Indexes that do not exist yet are
+    left alone rather than built.
+    """
+    if conn.in_transaction:
+        raise RuntimeError("deferred_indexes needs a connection with no open transaction")
+    conn.execute("BEGIN")
+    try:
+        existing = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'ohlc_data'")}
+        index_names = [name for name in index_names if name in existing]
+        for name in index_names:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        yield conn
+        for name in index_names:
+            conn.execute(OHLC_INDEXES[name])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
 class OHLCDatabase:
     def __init__(self, db_path: str = "data/historical_data.db"):
         self.db_path = db_path
@@ -17,7 +61,7 @@ class OHLCDatabase:
         with sqlite3.connect(self.db_path) as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS ohlc_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id INTEGER PRIMARY KEY,
                     symbol TEXT NOT NULL,
                     timestamp INTEGER NOT NULL,
                     open_price REAL NOT NULL,
@@ -31,15 +75,8 @@ class OHLCDatabase:
                 )
             """)
             
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_symbol_timestamp 
-                ON ohlc_data(symbol, timestamp)
-            """)
-            
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_symbol_timeframe_timestamp 
-                ON ohlc_data(symbol, timeframe, timestamp)
-            """)
+            for name in _REDUNDANT_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
             
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS collection_progress (
@@ -56,36 +93,50 @@ class OHLCDatabase:
             
             conn.commit()
     
-    def insert_ohlc_data(self, symbol: str, ohlc_data: List[Dict[str, Any]], timeframe: str = '1m') -> int:
-        """Insert OHLC data with conflict handling"""
+    def create_secondary_indexes(self):
+        """Build the optional OHLC_INDEXES (a one-time step; scans the whole table)"""
+        with sqlite3.connect(self.db_path) as conn:
+            for name, index_sql in OHLC_INDEXES.items():
+                logger.info(f"Building index {name}")
+                conn.execute(index_sql)
+            conn.commit()
+    
+    def insert_ohlc_data(self, symbol: str, ohlc_data: List[Dict[str, Any]], timeframe: str = '1m',
+                         conn: Optional[sqlite3.Connection] = None) -> int:
+        """Insert OHLC data with conflict handling (inside the caller's transaction when conn is given)"""
         if not ohlc_data:
             return 0
         
+        rows = []
+        for candle in ohlc_data:
+            try:
+                rows.append((
+                    symbol,
+                    int(candle['datetime']),
+                    float(candle['open']),
+                    float(candle['high']),
+                    float(candle['low']),
+                    float(candle['close']),
+                    int(candle['volume']),
+                    timeframe
+                ))
+            except (KeyError, ValueError, TypeError) as e:
+                logger.warning(f"Skipping invalid candle for {symbol}: {e}")
+                continue
+        
+        insert_sql = """
+            INSERT OR REPLACE INTO ohlc_data 
+            (symbol, timestamp, open_price, high_price, low_price, close_price, volume, timeframe)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        if conn is not None:
+            conn.executemany(insert_sql, rows)
+            return len(rows)
+        
         with sqlite3.connect(self.db_path) as conn:
-            inserted_count = 0
-            for candle in ohlc_data:
-                try:
-                    conn.execute("""
-                        INSERT OR REPLACE INTO ohlc_data 
-                        (symbol, timestamp, open_price, high_price, low_price, close_price, volume, timeframe)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        symbol,
-                        int(candle['datetime']),
-                        float(candle['open']),
-                        float(candle['high']),
-                        float(candle['low']),
-                        float(candle['close']),
-                        int(candle['volume']),
-                        timeframe
-                    ))
-                    inserted_count += 1
-                except (KeyError, ValueError, TypeError) as e:
-                    logger.warning(f"Skipping invalid candle for {symbol}: {e}")
-                    continue
-            
+            conn.executemany(insert_sql, rows)
             conn.commit()
-            return inserted_count
+            return len(rows)
     
     def get_ohlc_data(self, symbol: str, start_timestamp: int, end_timestamp: int, 
                       timeframe: str = '1m') -> List[Dict[str, Any]]:
@@ -170,4 +221,35 @@ class OHLCDatabase:
                     'latest_date': datetime.fromtimestamp(row[2]),
                     'price_range': {'min': row[3], 'max': row[4]}
                 }
-            return {'total_candles': 0}
\ No newline at end of file
+            return {'total_candles': 0}
+    
+    def get_symbols_stats(self, symbols: List[str], timeframe: str = '1m') -> Dict[str, Dict[str, Any]]:
+        """Get statistics for several symbols in a single grouped query"""
+        stats = {symbol: {'total_candles': 0} for symbol in symbols}
+        if not symbols:
+            return stats
+        
+        placeholders = ','.join('?' * len(symbols))
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute(f"""
+                SELECT 
+                    symbol,
+                    COUNT(*) as total_candles,
+                    MIN(timestamp) as earliest_timestamp,
+                    MAX(timestamp) as latest_timestamp,
+                    MIN(low_price) as min_price,
+                    MAX(high_price) as max_price
+                FROM ohlc_data 
+                WHERE symbol IN ({placeholders}) AND timeframe = ?
+                GROUP BY symbol
+            """, (*symbols, timeframe))
+            
+            for row in cursor.fetchall():
+                stats[row[0]] = {
+                    'total_candles': row[1],
+                    'earliest_date': datetime.fromtimestamp(row[2]),
+                    'latest_date': datetime.fromtimestamp(row[3]),
+                    'price_range': {'min': row[4], 'max': row[5]}
+                }
+        
+        return stats
@@ -21,6 +21,7 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from historical_collection.core.historical_data_manager import HistoricalDataManager
+from historical_collection.core.ohlc_database import OHLCDatabase
 
 def setup_logging(verbose: bool = False):
     """Set up logging configuration"""
@@ -54,6 +55,9 @@ Examples:
   
   # Skip data validation (faster but less reliable)
   python -m historical_collection.scripts.collect_historical --no-validation
+  
+  # Build the covering index for chart reads (one-time, scans the whole table)
+  python -m historical_collection.scripts.collect_historical --build-indexes
         """
     )
     
@@ -136,6 +140,12 @@ Examples:
         help='Collect all supported frequencies: 1m, 5m, daily'
     )
     
+    parser.add_argument(
+        '--build-indexes',
+        action='store_true',
+        help='Build the optional covering index on ohlc_data and exit'
+    )
+    
     parser.add_argument(
         '--verbose', '-v',
         action='store_true',
@@ -149,6 +159,13 @@ Examples:
     logger = logging.getLogger(__name__)
     
     try:
+        # Index builds only touch the database, so they don't need an API client
+        if args.build_indexes:
+            logger.info("🔨 Building secondary indexes...")
+            OHLCDatabase(args.db_path).create_secondary_indexes()
+            print("✅ Indexes built")
+            return 0
+        
         # Initialize the historical data manager
         logger.info("🚀 Initializing Historical Data Manager...")
         manager = HistoricalDataManager(
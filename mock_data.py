@@ -2,6 +2,7 @@
 
 import random
 import time
+from time import time_ns
 import json
 import threading
 import logging
@@ -86,6 +87,39 @@ class MockMarketDataGenerator:
         'VTI': 200.00
     }
     
+    # Per-tick lookup tables, built once instead of on every generated quote
+    VOLATILITY_FACTORS = {
+        MarketState.PRE_MARKET: 0.3,
+        MarketState.REGULAR_HOURS: 1.0,
+        MarketState.AFTER_HOURS: 0.5,
+        MarketState.CLOSED: 0.1
+    }
+    
+    BASE_VOLUMES = {
+        'AAPL': 80000000,
+        'MSFT': 30000000,
+        'GOOGL': 25000000,
+        'AMZN': 35000000,
+        'TSLA': 75000000,
+        'NVDA': 45000000,
+        'META': 20000000,
+        'SPY': 60000000,
+        'QQQ': 40000000,
+        'IWM': 25000000,
+        'DIA': 5000000,
+        'VTI': 8000000
+    }
+    
+    VOLUME_STATE_MULTIPLIERS = {
+        MarketState.PRE_MARKET: 0.1,
+        MarketState.REGULAR_HOURS: 1.0,
+        MarketState.AFTER_HOURS: 0.3,
+        MarketState.CLOSED: 0.05
+    }
+    
+    HIGH_VOLATILITY_SYMBOLS = frozenset(('TSLA', 'NVDA'))
+    LOW_VOLATILITY_SYMBOLS = frozenset(('SPY', 'VTI'))
+    
     def __init__(self):
         self.current_prices = self.BASE_PRICES.copy()
         self.daily_opens = self.BASE_PRICES.copy()
@@ -127,19 +161,12 @@ class MockMarketDataGenerator:
         market_state = self.get_market_state()
         
         # Base volatility factors
-        volatility_factors = {
-            MarketState.PRE_MARKET: 0.3,
-            MarketState.REGULAR_HOURS: 1.0,
-            MarketState.AFTER_HOURS: 0.5,
-            MarketState.CLOSED: 0.1
-        }
-        
-        base_volatility = volatility_factors[market_state]
+        base_volatility = self.VOLATILITY_FACTORS[market_state]
         
         # Symbol-specific volatility
-        if symbol in ['TSLA', 'NVDA']:
+        if symbol in self.HIGH_VOLATILITY_SYMBOLS:
             base_volatility *= 1.5  # High volatility stocks
-        elif symbol in ['SPY', 'VTI']:
+        elif symbol in self.LOW_VOLATILITY_SYMBOLS:
             base_volatility *= 0.7  # Lower volatility ETFs
         
         # Market trend influence
@@ -173,30 +200,7 @@ class MockMarketDataGenerator:
         market_state = self.get_market_state()
         
         # Base volumes per symbol type
-        base_volumes = {
-            'AAPL': 80000000,
-            'MSFT': 30000000,
-            'GOOGL': 25000000,
-            'AMZN': 35000000,
-            'TSLA': 75000000,
-            'NVDA': 45000000,
-            'META': 20000000,
-            'SPY': 60000000,
-            'QQQ': 40000000,
-            'IWM': 25000000,
-            'DIA': 5000000,
-            'VTI': 8000000
-        }
-        
-        base_volume = base_volumes.get(symbol, 10000000)
-        
-        # Market state multipliers
-        state_multipliers = {
-            MarketState.PRE_MARKET: 0.1,
-            MarketState.REGULAR_HOURS: 1.0,
-            MarketState.AFTER_HOURS: 0.3,
-            MarketState.CLOSED: 0.05
-        }
+        base_volume = self.BASE_VOLUMES.get(symbol, 10000000)
         
         # Simulate intraday volume pattern (higher at open/close)
         hour = datetime.now().hour
@@ -209,7 +213,7 @@ class MockMarketDataGenerator:
         else:
             time_multiplier = 1.0
         
-        volume_multiplier = state_multipliers[market_state] * time_multiplier
+        volume_multiplier = self.VOLUME_STATE_MULTIPLIERS[market_state] * time_multiplier
         
         # Add some randomness
         volume_multiplier *= random.uniform(0.5, 1.5)
@@ -266,7 +270,7 @@ class MockMarketDataGenerator:
             low_price=self.daily_lows[symbol],
             net_change=net_change,
             net_change_percent=net_change_percent,
-            timestamp=int(time.time() * 1000)
+            timestamp=time_ns() // 1_000_000
         )
     
     def set_market_conditions(self, trend: float = 0.0, volatility: float = 0.5):
@@ -336,7 +340,8 @@ class MockSchwabStreamer:
         return f'{{"service":"LEVELONE_EQUITIES","command":"SUBS","requestid":"1","keys":"{symbol}","fields":"{fields}"}}'
     
     def _streaming_loop(self):
-        """Main streaming loop"""
+        """Main streaming loop, ticking on fixed monotonic deadlines"""
+        next_tick = time.monotonic()
         while self.is_running and not self._stop_event.is_set():
             try:
                 if self.subscribed_symbols and self.message_handler:
@@ -351,8 +356,14 @@ class MockSchwabStreamer:
                         message = self._create_schwab_message(quote)
                         self.message_handler(message)
                 
-                # Wait for next update
-                self._stop_event.wait(self.update_interval)
+                # Wait until the next deadline so tick work doesn't stretch the cadence;
+                # if a tick overran, restart the schedule from now instead of bursting
+                next_tick += self.update_interval
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    self._stop_event.wait(delay)
+                else:
+                    next_tick = time.monotonic()
                 
             except Exception as e:
                 logger.error(f"Error in mock streaming loop: {e}")
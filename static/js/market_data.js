@@ -135,21 +135,12 @@ class MarketDataApp {
             this.updateConnectionStatus(false);
         });
 
-        this.socket.on('market_data', (data) => {
-            // Filter out non-equity data that might be sent accidentally
-            if (this.isValidSymbol(data.symbol)) {
-                this.updateMarketData(data.symbol, data.data);
-                
-                // Update mock mode status if provided
-                if (data.is_mock !== undefined) {
-                    this.isMockMode = data.is_mock;
-                    this.updateMockModeUI();
-                    // Update connection status with current mock mode
-                    this.updateConnectionStatus(this.socket.connected);
-                }
-            } else {
-                console.log('Filtered out invalid symbol:', data.symbol);
-            }
+        // Batched frames carry the latest update for each symbol; mode/status UI is refreshed once per frame
+        this.socket.on('market_data_batch', (batch) => {
+            Object.entries(batch.updates).forEach(([symbol, data]) => {
+                this.handleMarketUpdate(symbol, data);
+            });
+            this.updateDataSource(batch.is_mock);
         });
 
         this.socket.on('watchlist_updated', (data) => {
@@ -169,6 +160,25 @@ class MarketDataApp {
         });
     }
 
+    handleMarketUpdate(symbol, data) {
+        // Filter out non-equity data that might be sent accidentally
+        if (this.isValidSymbol(symbol)) {
+            this.updateMarketData(symbol, data);
+        } else {
+            console.log('Filtered out invalid symbol:', symbol);
+        }
+    }
+
+    updateDataSource(isMock) {
+        // Update mock mode status if provided
+        if (isMock !== undefined) {
+            this.isMockMode = isMock;
+            this.updateMockModeUI();
+            // Update connection status with current mock mode
+            this.updateConnectionStatus(this.socket.connected);
+        }
+    }
+
     isValidSymbol(symbol) {
         // Check if this looks like a valid stock symbol
         if (!symbol || typeof symbol !== 'string') return false;
@@ -1,6 +1,6 @@
 # streaming/equity_stream.py - Equity-specific streaming abstraction
 import logging
-import time
+from time import time_ns
 from typing import Dict, Any, Optional, Callable, List
 
 logger = logging.getLogger(__name__)
@@ -30,6 +30,23 @@ class EquityStreamProcessor:
         "net_change_percent": "42" # Field 42: Net Percent Change
     }
     
+    # Schwab keys in extraction order, resolved once for the per-tick path
+    _FIELD_KEYS = (
+        EQUITY_FIELDS["last_price"],
+        EQUITY_FIELDS["bid_price"],
+        EQUITY_FIELDS["ask_price"],
+        EQUITY_FIELDS["volume"],
+        EQUITY_FIELDS["high_price"],
+        EQUITY_FIELDS["low_price"],
+        EQUITY_FIELDS["net_change"],
+        EQUITY_FIELDS["net_change_percent"],
+    )
+    
+    # Price fields that must be positive when present
+    _PRICE_FIELDS = ('last_price', 'bid_price', 'ask_price', 'high_price', 'low_price')
+    
+    __slots__ = ('is_mock_mode',)
+    
     def __init__(self):
         self.is_mock_mode = False
         
@@ -109,7 +126,10 @@ class EquityStreamProcessor:
     def _process_equity_data(self, data_item: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Process individual equity data item and return all valid symbols"""
         try:
-            timestamp = data_item.get("timestamp", int(time.time() * 1000))
+            # Only read the clock when the frame carries no timestamp
+            timestamp = data_item.get("timestamp")
+            if timestamp is None:
+                timestamp = time_ns() // 1_000_000
             results = []
             
             if not data_item.get("content"):
@@ -137,18 +157,24 @@ class EquityStreamProcessor:
     def _extract_equity_fields(self, symbol: str, content: Dict[str, Any], timestamp: int) -> Dict[str, Any]:
         """Extract equity fields from Schwab content using field mappings"""
         # Debug logging to see what fields are available
-        logger.info(f"Raw content for {symbol}: {content}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Raw content for {symbol}: {content}")
+        
+        # One C-level pass over the keys; missing fields come back as None
+        (last_price, bid_price, ask_price, volume, high_price, low_price,
+         net_change, net_change_percent) = map(content.get, self._FIELD_KEYS)
+        safe_float = self._safe_float
         
         return {
             'symbol': symbol,
-            'last_price': self._safe_float(content.get(self.EQUITY_FIELDS["last_price"])),
-            'bid_price': self._safe_float(content.get(self.EQUITY_FIELDS["bid_price"])),
-            'ask_price': self._safe_float(content.get(self.EQUITY_FIELDS["ask_price"])),
-            'volume': self._safe_int(content.get(self.EQUITY_FIELDS["volume"])),
-            'high_price': self._safe_float(content.get(self.EQUITY_FIELDS["high_price"])),
-            'low_price': self._safe_float(content.get(self.EQUITY_FIELDS["low_price"])),
-            'net_change': self._safe_float(content.get(self.EQUITY_FIELDS["net_change"])),
-            'net_change_percent': self._safe_float(content.get(self.EQUITY_FIELDS["net_change_percent"])),
+            'last_price': safe_float(last_price),
+            'bid_price': safe_float(bid_price),
+            'ask_price': safe_float(ask_price),
+            'volume': self._safe_int(volume),
+            'high_price': safe_float(high_price),
+            'low_price': safe_float(low_price),
+            'net_change': safe_float(net_change),
+            'net_change_percent': safe_float(net_change_percent),
             'timestamp': timestamp,
             'data_source': 'MOCK' if self.is_mock_mode else 'SCHWAB_API',
             'asset_type': 'EQUITY'
@@ -161,26 +187,26 @@ class EquityStreamProcessor:
             if not equity_data.get('symbol'):
                 return False
                 
-            # Check that at least one price field is present
-            has_price_data = any([
-                equity_data.get('last_price') is not None,
-                equity_data.get('bid_price') is not None,
-                equity_data.get('ask_price') is not None
-            ])
+            # Check that at least one price field is present (short-circuits on the first hit)
+            has_price_data = (
+                equity_data['last_price'] is not None or
+                equity_data['bid_price'] is not None or
+                equity_data['ask_price'] is not None
+            )
             
             if not has_price_data:
                 logger.debug(f"No price data for {equity_data['symbol']}, skipping")
                 return False
                 
             # Basic price validation for non-None values
-            for price_field in ['last_price', 'bid_price', 'ask_price', 'high_price', 'low_price']:
-                price = equity_data.get(price_field)
+            for price_field in self._PRICE_FIELDS:
+                price = equity_data[price_field]
                 if price is not None and price <= 0:
                     logger.warning(f"Invalid {price_field} for {equity_data['symbol']}: {price}")
                     return False
                 
             # Volume validation
-            volume = equity_data.get('volume')
+            volume = equity_data['volume']
             if volume is not None and volume < 0:
                 logger.warning(f"Invalid volume for {equity_data['symbol']}: {volume}")
                 return False
@@ -7,6 +7,9 @@ from .equity_stream import EquityStreamProcessor
 
 logger = logging.getLogger(__name__)
 
+# LEVELONE_EQUITIES fields requested for every subscription
+EQUITY_SUBSCRIPTION_FIELDS = "0,1,2,3,4,5,6,8,10,11,12,17,18,42"
+
 class EquityStreamManager(StreamManager):
     """
     Equity-specific stream manager that extends the generic StreamManager
@@ -17,6 +20,7 @@ class EquityStreamManager(StreamManager):
         super().__init__()
         self.equity_processor = EquityStreamProcessor()
         self.equity_data_handler: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._is_mock_streamer = False
         
         # Override the message handler to use equity processing
         super().set_message_handler(self._process_equity_message)
@@ -25,6 +29,8 @@ class EquityStreamManager(StreamManager):
         """Inject dependencies and configure for equity streaming"""
         super().set_dependencies(streamer, socketio)
         self.equity_processor.set_mock_mode(is_mock_mode)
+        # The streamer type is fixed once injected; resolve mock vs real here, not per call
+        self._is_mock_streamer = hasattr(streamer, 'add_symbol')
         
     def set_equity_data_handler(self, handler: Callable[[Dict[str, Any]], None]):
         """Set handler for processed equity data"""
@@ -65,12 +71,12 @@ class EquityStreamManager(StreamManager):
         if success:
             # Send unsubscribe message to streamer
             try:
-                if hasattr(self.streamer, 'add_symbol'):
+                if self._is_mock_streamer:
                     # Mock streamer - no special handling needed
                     pass
                 else:
                     # Real Schwab streamer - send UNSUBS command
-                    self.streamer.send(self.streamer.level_one_equities(symbol, "0,1,2,3,4,5,6,8,10,11,12,17,18,42", command="UNSUBS"))
+                    self._send_level_one(symbol, command="UNSUBS")
                     logger.info(f"Sent equity unsubscription for {symbol}")
             except Exception as e:
                 logger.error(f"Error unsubscribing from equity {symbol}: {e}")
@@ -90,7 +96,7 @@ class EquityStreamManager(StreamManager):
     def clear_and_resubscribe_all(self) -> bool:
         """Clear all existing subscriptions and resubscribe to watchlist"""
         try:
-            if hasattr(self.streamer, 'add_symbol'):
+            if self._is_mock_streamer:
                 # Mock streamer - just clear and resubscribe
                 logger.info("Mock mode - clearing and resubscribing all symbols")
                 subscribed_symbols = list(self.get_subscriptions())
@@ -100,7 +106,7 @@ class EquityStreamManager(StreamManager):
             else:
                 # Real Schwab streamer - send VIEW command to clear all subscriptions
                 logger.info("Clearing all existing subscriptions...")
-                self.streamer.send(self.streamer.level_one_equities("", "", command="VIEW"))
+                self._send_level_one("", fields="", command="VIEW")
                 
                 # Get subscribed symbols before clearing
                 subscribed_symbols = list(self.get_subscriptions())
@@ -110,7 +116,7 @@ class EquityStreamManager(StreamManager):
                 if subscribed_symbols:
                     symbols_str = ",".join(subscribed_symbols)
                     logger.info(f"Subscribing to all symbols at once: {symbols_str}")
-                    self.streamer.send(self.streamer.level_one_equities(symbols_str, "0,1,2,3,4,5,6,8,10,11,12,17,18,42"))
+                    self._send_level_one(symbols_str)
                     
                     # Add all symbols back to subscription manager
                     for symbol in subscribed_symbols:
@@ -141,14 +147,18 @@ class EquityStreamManager(StreamManager):
     def _subscribe_to_equity(self, symbol: str):
         """Send equity-specific subscription to streamer"""
         try:
-            if hasattr(self.streamer, 'add_symbol'):
+            if self._is_mock_streamer:
                 # Mock streamer method
                 self.streamer.add_symbol(symbol)
                 logger.info(f"Added {symbol} to mock equity stream")
             else:
                 # Real Schwab streamer - send level one equity subscription
-                self.streamer.send(self.streamer.level_one_equities(symbol, "0,1,2,3,4,5,6,8,10,11,12,17,18,42"))
+                self._send_level_one(symbol)
                 logger.info(f"Sent equity subscription for {symbol}")
                 
         except Exception as e:
-            logger.error(f"Error subscribing to equity {symbol}: {e}")
\ No newline at end of file
+            logger.error(f"Error subscribing to equity {symbol}: {e}")
+
+    def _send_level_one(self, keys: str, fields: str = EQUITY_SUBSCRIPTION_FIELDS, **kwargs):
+        """Send a LEVELONE_EQUITIES request to the real Schwab streamer"""
+        self.streamer.send(self.streamer.level_one_equities(keys, fields, **kwargs))
@@ -0,0 +1,31 @@
+# streaming/fast_json.py - Fastest available JSON codec for stream frames and socket.io payloads
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Prefer orjson, then ujson; both return the same dict/list shapes as stdlib json.
+# dumps() always returns compact str so this module can be handed to SocketIO(json=...).
+try:
+    import orjson
+    loads = orjson.loads
+    JSON_BACKEND = 'orjson'
+
+    def dumps(obj, **kwargs) -> str:
+        """Serialize compactly; stdlib-style kwargs such as separators are ignored"""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    try:
+        import ujson
+        loads = ujson.loads
+        JSON_BACKEND = 'ujson'
+
+        def dumps(obj, **kwargs) -> str:
+            """Serialize compactly; stdlib-style kwargs such as separators are ignored"""
+            return ujson.dumps(obj)
+    except ImportError:
+        import json
+        loads = json.loads
+        dumps = json.dumps
+        JSON_BACKEND = 'json'
+
+logger.debug(f"Using {JSON_BACKEND} for stream message decoding")
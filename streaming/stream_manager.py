@@ -3,9 +3,13 @@ import logging
 import threading
 from typing import Optional, Callable, Dict, Any
 from .subscription_manager import SubscriptionManager
+from .fast_json import loads as _loads
 
 logger = logging.getLogger(__name__)
 
+# Heartbeat frames are tiny ({"notify":[{"heartbeat":"..."}]}); anything longer is never one
+_HEARTBEAT_MAX_LEN = 128
+
 class StreamManager:
     """Generic streaming manager that can work with any streaming client"""
     
@@ -105,12 +109,23 @@ class StreamManager:
     def _process_raw_message(self, raw_message: str):
         """Process raw message from streamer and convert to dict"""
         try:
-            import json
             if isinstance(raw_message, str):
-                message_data = json.loads(raw_message)
+                # Drop heartbeats with a substring check instead of a JSON parse
+                if len(raw_message) < _HEARTBEAT_MAX_LEN and '"heartbeat"' in raw_message and '"data"' not in raw_message:
+                    return
+                message_data = _loads(raw_message)
+            elif isinstance(raw_message, bytes):
+                if len(raw_message) < _HEARTBEAT_MAX_LEN and b'"heartbeat"' in raw_message and b'"data"' not in raw_message:
+                    return
+                message_data = _loads(raw_message)
             else:
                 message_data = raw_message
-                
+
+            # Heartbeats arrive as a single-item notify list and carry no data
+            notify = message_data.get('notify')
+            if notify and 'heartbeat' in notify[0] and 'data' not in message_data:
+                return
+
             # Pass to message handler
             if self.message_handler:
                 self.message_handler(message_data)
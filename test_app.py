@@ -0,0 +1,130 @@
+# test_app.py - Tests for the Flask layer: symbol validation, static asset serving, login cache
+
+import sys
+import os
+import gzip
+import hashlib
+import unittest
+
+# Add the project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+from app import app, static_url, Config
+from features.market_data_routes import _symbol_from, _SYMBOL_RE
+
+MAIN_CSS = os.path.join(Config.STATIC_DIR, 'css', 'main.css')
+
+class SymbolValidationTests(unittest.TestCase):
+    """Request/socket payload symbol normalization and format check"""
+
+    def test_symbol_from_normalizes(self):
+        self.assertEqual(_symbol_from({'symbol': ' aapl '}), 'AAPL')
+        self.assertEqual(_symbol_from({'symbol': 'MSFT'}), 'MSFT')
+
+    def test_symbol_from_missing_or_invalid(self):
+        self.assertEqual(_symbol_from(None), '')
+        self.assertEqual(_symbol_from({}), '')
+        self.assertEqual(_symbol_from({'symbol': None}), '')
+        self.assertEqual(_symbol_from({'symbol': 123}), '')
+        self.assertEqual(_symbol_from({'symbol': ['AAPL']}), '')
+
+    def test_symbol_pattern(self):
+        for symbol in ('A', 'SPY', 'GOOGL'):
+            self.assertTrue(_SYMBOL_RE.match(symbol), symbol)
+        for symbol in ('', 'TOOLONG', 'BRK.B', 'AAPL1', 'aapl', 'AAPL\n'):
+            self.assertFalse(_SYMBOL_RE.match(symbol), repr(symbol))
+
+class PrecompressedStaticTests(unittest.TestCase):
+    """serve_precompressed_static swaps in compressed bodies with their own validators"""
+
+    def setUp(self):
+        app_module._precompress_static()
+        self.client = app.test_client()
+        with open(MAIN_CSS, 'rb') as f:
+            self.content = f.read()
+
+    def tearDown(self):
+        app_module._compressed_static.clear()
+
+    def test_gzip_body_and_etag(self):
+        response = self.client.get('/static/css/main.css', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.data), self.content)
+        self.assertIn('Accept-Encoding', response.vary)
+        self.assertNotIn('Cookie', response.vary)
+        etag, is_weak = response.get_etag()
+        self.assertTrue(etag.endswith('-gzip'))
+        self.assertFalse(is_weak)
+
+    def test_gzip_revalidation_returns_304(self):
+        first = self.client.get('/static/css/main.css', headers={'Accept-Encoding': 'gzip'})
+        second = self.client.get('/static/css/main.css', headers={
+            'Accept-Encoding': 'gzip',
+            'If-None-Match': first.headers['ETag']
+        })
+
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.data, b'')
+        self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+
+    def test_identity_response_unchanged(self):
+        response = self.client.get('/static/css/main.css')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.data, self.content)
+        etag, _ = response.get_etag()
+        self.assertFalse(etag.endswith('-gzip'))
+
+class StaticUrlTests(unittest.TestCase):
+    """static_url fingerprints assets with a content hash"""
+
+    def test_fingerprint_is_content_hash(self):
+        digest = hashlib.sha1(open(MAIN_CSS, 'rb').read()).hexdigest()[:12]
+        with app.test_request_context():
+            self.assertEqual(static_url('css/main.css'), f'/static/css/main.css?v={digest}')
+
+    def test_missing_file_has_no_version(self):
+        with app.test_request_context():
+            self.assertEqual(static_url('css/missing.css'), '/static/css/missing.css')
+
+class LoginPageCacheTests(unittest.TestCase):
+    """The no-flash /login render is cached; flashes always render fresh"""
+
+    def setUp(self):
+        self.was_debug = app.debug
+        app.debug = False
+        app_module._login_html = None
+        self.client = app.test_client()
+
+    def tearDown(self):
+        app.debug = self.was_debug
+        app_module._login_html = None
+
+    def test_plain_login_served_from_cache(self):
+        first = self.client.get('/login')
+        cached = app_module._login_html
+
+        self.assertEqual(first.status_code, 200)
+        self.assertIsNotNone(cached)
+        self.assertEqual(first.data, cached)
+        self.assertEqual(self.client.get('/login').data, cached)
+        self.assertIs(app_module._login_html, cached)
+
+    def test_flashes_skip_cache(self):
+        self.client.get('/login')
+        cached = app_module._login_html
+        with self.client.session_transaction() as sess:
+            sess['_flashes'] = [('info', 'Logged out successfully')]
+
+        response = self.client.get('/login')
+
+        self.assertIn(b'Logged out successfully', response.data)
+        self.assertIs(app_module._login_html, cached)
+        self.assertEqual(self.client.get('/login').data, cached)
+
+if __name__ == "__main__":
+    unittest.main()
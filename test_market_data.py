@@ -0,0 +1,177 @@
+# test_market_data.py - Tests for the market data pipeline (broadcaster, stream filter, manager caches)
+
+import sys
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+# Add the project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from features.market_data import MarketDataManager
+from features.market_data_broadcaster import MarketDataBroadcaster
+from streaming.stream_manager import StreamManager
+
+class RecordingSocketIO:
+    """Minimal socket.io server that records emits and runs background tasks as threads"""
+
+    def __init__(self):
+        self.events = []
+        self.tasks = []
+
+    def emit(self, event, data=None, **kwargs):
+        self.events.append((event, data))
+
+    def start_background_task(self, target, *args, **kwargs):
+        task = threading.Thread(target=target, args=args, kwargs=kwargs, daemon=True)
+        task.start()
+        self.tasks.append(task)
+        return task
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+class MarketDataBroadcasterTests(unittest.TestCase):
+    """Coalescing, queue bound and restart behaviour of MarketDataBroadcaster"""
+
+    def setUp(self):
+        self.socketio = RecordingSocketIO()
+
+    def test_updates_coalesce_to_latest_per_symbol(self):
+        """Updates queued within one window go out as one frame with the newest quote per symbol"""
+        broadcaster = MarketDataBroadcaster(batch_interval=0.05)
+        broadcaster.set_dependencies(self.socketio)
+        for price in (100.0, 101.0, 102.0):
+            broadcaster.publish('AAPL', {'last_price': price}, True)
+        broadcaster.publish('MSFT', {'last_price': 300.0}, True)
+
+        broadcaster.start()
+        time.sleep(0.3)
+        broadcaster.stop()
+
+        self.assertEqual(len(self.socketio.events), 1)
+        event, payload = self.socketio.events[0]
+        self.assertEqual(event, 'market_data_batch')
+        self.assertEqual(payload['updates'], {
+            'AAPL': {'last_price': 102.0},
+            'MSFT': {'last_price': 300.0}
+        })
+        self.assertTrue(payload['is_mock'])
+
+    def test_publish_drops_when_queue_full(self):
+        """publish() never blocks; updates past max_queue_size are dropped"""
+        broadcaster = MarketDataBroadcaster(max_queue_size=2)
+        for price in (1.0, 2.0, 3.0):
+            broadcaster.publish('AAPL', {'last_price': price}, False)
+
+        self.assertEqual(broadcaster.updates.qsize(), 2)
+        self.assertEqual(broadcaster._dropped, 1)
+
+    def test_restart_retires_previous_worker(self):
+        """A stop()/start() within one wait leaves only the new worker emitting"""
+        broadcaster = MarketDataBroadcaster(batch_interval=0.01)
+        broadcaster.set_dependencies(self.socketio)
+        broadcaster.start()
+        broadcaster.stop()
+        broadcaster.start()
+        try:
+            first_worker, second_worker = self.socketio.tasks
+            first_worker.join(timeout=2.0)
+            self.assertFalse(first_worker.is_alive())
+            self.assertTrue(second_worker.is_alive())
+
+            broadcaster.publish('SPY', {'last_price': 450.0}, False)
+            time.sleep(0.2)
+            self.assertEqual(len(self.socketio.events), 1)
+        finally:
+            broadcaster.stop()
+
+class StreamManagerHeartbeatTests(unittest.TestCase):
+    """Heartbeat frames are dropped before reaching the message handler"""
+
+    def setUp(self):
+        self.received = []
+        self.manager = StreamManager()
+        self.manager.set_message_handler(self.received.append)
+
+    def test_heartbeat_text_frames_skipped(self):
+        self.manager._process_raw_message('{"notify":[{"heartbeat":"1700000000000"}]}')
+        self.manager._process_raw_message(b'{"notify":[{"heartbeat":"1700000000000"}]}')
+        self.assertEqual(self.received, [])
+
+    def test_heartbeat_dict_skipped(self):
+        self.manager._process_raw_message({'notify': [{'heartbeat': '1700000000000'}]})
+        self.assertEqual(self.received, [])
+
+    def test_data_frames_delivered(self):
+        """Frames with data are decoded and passed on, even if they mention a heartbeat"""
+        data_frame = {'data': [{'service': 'LEVELONE_EQUITIES', 'content': [{'key': 'AAPL', '3': 190.5}]}]}
+        self.manager._process_raw_message(json.dumps(data_frame))
+        self.manager._process_raw_message(json.dumps(data_frame).encode())
+        mixed = {'notify': [{'heartbeat': '1700000000000'}], 'data': []}
+        self.manager._process_raw_message(json.dumps(mixed))
+
+        self.assertEqual(self.received, [data_frame, data_frame, mixed])
+
+class MarketDataManagerCacheTests(unittest.TestCase):
+    """Snapshot JSON cache and per-thread database connection cache"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_dir = os.path.join(self.tmp_dir, 'data')
+        os.makedirs(self.data_dir)
+        self.manager = MarketDataManager(self.data_dir)
+
+    def tearDown(self):
+        self.manager.close_db_connections()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_market_data_json_reencodes_only_on_new_snapshot(self):
+        self.manager._publish_market_data('AAPL', {'symbol': 'AAPL', 'last_price': 190.5})
+        first = json.loads(self.manager.get_market_data_json())
+        cached_snapshot, cached_encoded = self.manager._market_data_json
+
+        again = json.loads(self.manager.get_market_data_json())
+        self.assertIs(self.manager._market_data_json[1], cached_encoded)
+        self.assertEqual(again['market_data'], first['market_data'])
+
+        self.manager._publish_market_data('MSFT', {'symbol': 'MSFT', 'last_price': 410.0})
+        updated = json.loads(self.manager.get_market_data_json())
+        self.assertIsNot(self.manager._market_data_json[0], cached_snapshot)
+        self.assertEqual(set(updated['market_data']), {'AAPL', 'MSFT'})
+        self.assertEqual(updated['data_source'], 'SCHWAB_API')
+        self.assertFalse(updated['is_mock_mode'])
+
+    def test_db_connection_cached_per_thread_and_mode(self):
+        conn = self.manager.get_db_connection(False)
+        self.assertIs(self.manager.get_db_connection(False), conn)
+        self.assertIsNot(self.manager.get_db_connection(True), conn)
+
+        other_thread = []
+        worker = threading.Thread(target=lambda: other_thread.append(self.manager.get_db_connection(False)))
+        worker.start()
+        worker.join()
+        self.assertIsNot(other_thread[0], conn)
+
+    def test_db_connection_rolls_over_with_date(self):
+        """A new day opens a new file and closes the previous day's connection"""
+        with patch('features.market_data.datetime') as mock_datetime:
+            mock_datetime.now.return_value = datetime(2026, 10, 15, 15, 59)
+            old_conn = self.manager.get_db_connection(False)
+            mock_datetime.now.return_value = datetime(2026, 10, 16, 9, 30)
+            new_conn = self.manager.get_db_connection(False)
+
+        self.assertIsNot(new_conn, old_conn)
+        with self.assertRaises(sqlite3.ProgrammingError):
+            old_conn.execute('SELECT 1')
+        self.assertTrue(os.path.exists(os.path.join(self.data_dir, 'market_data_261016.db')))
+
+if __name__ == "__main__":
+    unittest.main()
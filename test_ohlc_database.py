@@ -0,0 +1,120 @@
+# test_ohlc_database.py - Tests for the historical OHLC database
+
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+# Add the project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from historical_collection.core.ohlc_database import OHLCDatabase, OHLC_INDEXES, deferred_indexes
+
+def make_candles(count: int, start: int = 1_700_000_000, base: float = 100.0) -> list:
+    """Minute candles in the shape returned by the Schwab price history API"""
+    return [{
+        'datetime': start + i * 60,
+        'open': base + i,
+        'high': base + i + 1,
+        'low': base + i - 1,
+        'close': base + i + 0.5,
+        'volume': 1000 + i
+    } for i in range(count)]
+
+class OHLCDatabaseTests(unittest.TestCase):
+    """OHLCDatabase against a temporary SQLite file"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.database = OHLCDatabase(os.path.join(self.tmp_dir, 'historical_data.db'))
+        self.database.create_secondary_indexes()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def index_names(self) -> set:
+        with sqlite3.connect(self.database.db_path) as conn:
+            rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+        return {row[0] for row in rows}
+
+    def count_rows(self) -> int:
+        with sqlite3.connect(self.database.db_path) as conn:
+            return conn.execute('SELECT COUNT(*) FROM ohlc_data').fetchone()[0]
+
+    def test_constructor_builds_no_secondary_indexes(self):
+        """Opening the database never pays for an index build; redundant indexes are dropped"""
+        db_path = os.path.join(self.tmp_dir, 'fresh.db')
+        with sqlite3.connect(db_path) as conn:
+            conn.execute('CREATE TABLE ohlc_data (symbol TEXT, timestamp INTEGER)')
+            conn.execute('CREATE INDEX idx_symbol_timestamp ON ohlc_data(symbol, timestamp)')
+        OHLCDatabase(db_path)
+
+        with sqlite3.connect(db_path) as conn:
+            names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertNotIn('idx_symbol_timestamp', names)
+        self.assertFalse(set(OHLC_INDEXES) & names)
+
+    def test_deferred_indexes_load_rebuilds_indexes(self):
+        """A deferred-index load across symbols commits every row and leaves the indexes in place"""
+        conn = sqlite3.connect(self.database.db_path)
+        try:
+            with deferred_indexes(conn, OHLC_INDEXES):
+                self.database.insert_ohlc_data('AAPL', make_candles(200), conn=conn)
+                self.database.insert_ohlc_data('MSFT', make_candles(100), conn=conn)
+        finally:
+            conn.close()
+
+        self.assertEqual(self.count_rows(), 300)
+        self.assertTrue(set(OHLC_INDEXES) <= self.index_names())
+
+    def test_deferred_indexes_refuses_open_transaction(self):
+        """The caller's pending work is never committed behind its back"""
+        conn = sqlite3.connect(self.database.db_path)
+        try:
+            self.database.insert_ohlc_data('AAPL', make_candles(5), conn=conn)
+            with self.assertRaises(RuntimeError):
+                with deferred_indexes(conn, OHLC_INDEXES):
+                    pass
+            conn.rollback()
+        finally:
+            conn.close()
+
+        self.assertEqual(self.count_rows(), 0)
+        self.assertTrue(set(OHLC_INDEXES) <= self.index_names())
+
+    def test_indexes_survive_failed_bulk_load(self):
+        """A failing load rolls back its rows and the index drop together"""
+        self.database.insert_ohlc_data('SPY', make_candles(10))
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            with sqlite3.connect(self.database.db_path) as conn:
+                with deferred_indexes(conn, OHLC_INDEXES):
+                    self.database.insert_ohlc_data('AAPL', make_candles(50), conn=conn)
+                    conn.execute("INSERT INTO ohlc_data (symbol) VALUES ('BAD')")
+
+        self.assertEqual(self.count_rows(), 10)
+        self.assertTrue(set(OHLC_INDEXES) <= self.index_names())
+
+    def test_symbols_stats_match_single_symbol_stats(self):
+        """The grouped query returns what get_symbol_stats returns per symbol"""
+        self.database.insert_ohlc_data('AAPL', make_candles(30, base=150.0))
+        self.database.insert_ohlc_data('MSFT', make_candles(45, start=1_700_100_000, base=300.0))
+        self.database.insert_ohlc_data('AAPL', make_candles(5, base=150.0), timeframe='5m')
+
+        symbols = ['AAPL', 'MSFT', 'QQQ']
+        stats = self.database.get_symbols_stats(symbols)
+
+        self.assertEqual(list(stats), symbols)
+        for symbol in symbols:
+            self.assertEqual(stats[symbol], self.database.get_symbol_stats(symbol))
+        self.assertEqual(stats['AAPL']['total_candles'], 30)
+        self.assertEqual(stats['QQQ'], {'total_candles': 0})
+
+    def test_symbols_stats_empty_list(self):
+        """No symbols means no query and an empty result"""
+        self.assertEqual(self.database.get_symbols_stats([]), {})
+
+if __name__ == "__main__":
+    unittest.main()
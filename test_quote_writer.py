@@ -0,0 +1,161 @@
+# test_quote_writer.py - Tests for the batched SQLite quote writer
+
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+# Add the project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from features.market_data import _SCHEMA_SQL
+from features.quote_writer import QuoteWriter
+
+def make_row(i: int, symbol: str = 'AAPL') -> tuple:
+    """An equity_quotes row tuple in EQUITY_INSERT_SQL order"""
+    return (symbol, 1_700_000_000_000 + i, 100.0 + i, 99.9, 100.1, 1000 + i,
+            0.5, 0.5, 101.0, 99.0, 'MOCK')
+
+class QuoteWriterTests(unittest.TestCase):
+    """QuoteWriter against a temporary WAL database"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'quotes.db')
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript(_SCHEMA_SQL)
+        self.busy_timeout_ms = 5000
+        self._local = threading.local()
+        self._connections = []
+
+    def tearDown(self):
+        for conn in self._connections:
+            conn.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def connection_factory(self) -> sqlite3.Connection:
+        """Per-thread cached connection, like MarketDataManager.get_db_connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute(f'PRAGMA busy_timeout={self.busy_timeout_ms}')
+            self._local.conn = conn
+            self._connections.append(conn)
+        return conn
+
+    def factory_for(self, db_path: str, delay: float = 0.0):
+        """Per-thread connection factory for one database file, optionally slow"""
+        local = threading.local()
+        def factory() -> sqlite3.Connection:
+            time.sleep(delay)
+            conn = getattr(local, 'conn', None)
+            if conn is None:
+                conn = local.conn = sqlite3.connect(db_path, check_same_thread=False)
+                self._connections.append(conn)
+            return conn
+        return factory
+
+    def count_rows(self, db_path: str = None, symbol: str = None) -> int:
+        with sqlite3.connect(db_path or self.db_path) as conn:
+            if symbol:
+                return conn.execute('SELECT COUNT(*) FROM equity_quotes WHERE symbol = ?',
+                                    (symbol,)).fetchone()[0]
+            return conn.execute('SELECT COUNT(*) FROM equity_quotes').fetchone()[0]
+
+    def test_rows_land_and_queue_drains_on_stop(self):
+        """Every queued row is written by the time stop() returns"""
+        writer = QuoteWriter(self.connection_factory, batch_size=100, flush_interval=5.0)
+        writer.start()
+        for i in range(1250):
+            writer.enqueue(make_row(i))
+        writer.stop()
+
+        self.assertFalse(writer.is_running())
+        self.assertTrue(writer.rows.empty())
+        self.assertEqual(self.count_rows(), 1250)
+
+    def test_rows_drop_when_queue_full(self):
+        """enqueue() never blocks; rows past max_queue_size are dropped"""
+        writer = QuoteWriter(self.connection_factory, max_queue_size=5)
+        for i in range(8):
+            writer.enqueue(make_row(i))
+
+        self.assertEqual(writer.rows.qsize(), 5)
+        self.assertEqual(writer._dropped, 3)
+
+        writer.start()
+        writer.stop()
+        self.assertEqual(self.count_rows(), 5)
+
+    def test_flush_retries_while_database_locked(self):
+        """A batch is retried with backoff until another writer releases the lock"""
+        self.busy_timeout_ms = 0
+        blocker = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        blocker.execute('BEGIN IMMEDIATE')
+        release = threading.Timer(0.08, blocker.execute, args=('COMMIT',))
+        release.start()
+        try:
+            writer = QuoteWriter(self.connection_factory)
+            writer._flush([make_row(i) for i in range(10)])
+        finally:
+            release.join()
+            blocker.close()
+
+        self.assertEqual(self.count_rows(), 10)
+        self.assertFalse(self.connection_factory().in_transaction)
+
+    def test_checkpoint_truncates_wal(self):
+        """The writer's own checkpoint folds the WAL back and truncates it"""
+        writer = QuoteWriter(self.connection_factory)
+        writer._flush([make_row(i) for i in range(50)])
+        wal_path = self.db_path + '-wal'
+        self.assertGreater(os.path.getsize(wal_path), 0)
+
+        writer._checkpoint()
+        self.assertEqual(os.path.getsize(wal_path), 0)
+        self.assertEqual(self.count_rows(), 50)
+
+    def test_restart_uses_fresh_stop_event(self):
+        """Restarting after stop() does not reuse the previous run's stop event"""
+        writer = QuoteWriter(self.connection_factory)
+        writer.start()
+        first_event = writer._stop_event
+        writer.stop()
+        writer.start()
+        try:
+            self.assertTrue(first_event.is_set())
+            self.assertIsNot(writer._stop_event, first_event)
+            self.assertFalse(writer._stop_event.is_set())
+        finally:
+            writer.stop()
+
+    def test_mode_flip_drains_into_previous_database(self):
+        """A run still draining after a timed-out stop() keeps its database; the next run waits"""
+        new_db_path = os.path.join(self.tmp_dir, 'new_mode.db')
+        with sqlite3.connect(new_db_path) as conn:
+            conn.executescript(_SCHEMA_SQL)
+
+        writer = QuoteWriter(self.connection_factory, flush_interval=0.05)
+        writer.start(self.factory_for(self.db_path, delay=0.3))
+        for i in range(10):
+            writer.enqueue(make_row(i, symbol='OLD'))
+
+        writer.stop(timeout=0.05)
+        self.assertTrue(writer.is_running())
+
+        writer.start(self.factory_for(new_db_path))
+        for i in range(5):
+            writer.enqueue(make_row(i, symbol='NEW'))
+        writer.stop()
+
+        self.assertEqual(self.count_rows(self.db_path, 'OLD'), 10)
+        self.assertEqual(self.count_rows(self.db_path, 'NEW'), 0)
+        self.assertEqual(self.count_rows(new_db_path, 'NEW'), 5)
+        self.assertEqual(self.count_rows(new_db_path, 'OLD'), 0)
+
+if __name__ == "__main__":
+    unittest.main()